@@ -7,14 +7,20 @@ app.py the Python Flask App solution to the Recursive File Structure test
 from flask import Flask, render_template
 from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField
-from flask import request
+from flask import request, abort
 import json
+import os
 from path_interface import Path_Interface
 
 # create an instance of Flask
 app = Flask(__name__)
 # Prior to deployment create a unique id for this app (store it in config) 
 app.config['SECRET_KEY'] = 'TODO'
+# Opt-in profiling of searches slower than the threshold (seconds),
+# turned on by setting the environment variable PROFILE_SLOW_QUERIES=1
+app.config['PROFILE_SLOW_QUERIES'] = os.environ.get('PROFILE_SLOW_QUERIES', '').lower() in ('1', 'true', 'yes')
+app.config['SLOW_QUERY_THRESHOLD'] = float(os.environ.get('SLOW_QUERY_THRESHOLD', 0.5))
+app.config['MAX_QUERY_PROFILES'] = int(os.environ.get('MAX_QUERY_PROFILES', 20))
 
 # Create an instance of the Path_Interface  
 __pi = Path_Interface()
@@ -23,6 +29,17 @@ __pi = Path_Interface()
 # - store the file structure in the database
 __pi.initialise()
 
+@app.before_request
+def configure_profiling():
+  '''
+  Turn profiling of slow queries on or off, to match app.config
+  '''
+  if app.config['PROFILE_SLOW_QUERIES']:
+    if not __pi.is_profiling():
+      __pi.enable_profiling(app.config['SLOW_QUERY_THRESHOLD'], app.config['MAX_QUERY_PROFILES'])
+  else:
+    __pi.disable_profiling()
+
 def query_database(query):
   '''
   Query/search the database
@@ -73,6 +90,16 @@ def rest_page():
   json_object = json.dumps(result, indent = 4)
   return json_object
 
+#route debug page, listing the profiles of slow queries
+@app.route('/debug/profiles')
+def profiles_page():
+  profiles = __pi.get_profiles()
+  if profiles is None:
+    abort(404) # profiling is not enabled
+
+  json_object = json.dumps(profiles, indent = 4)
+  return json_object
+
 if __name__ == '__main__':
   # using debug mode whilst developing
   app.run(debug=True)
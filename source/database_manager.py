@@ -4,11 +4,17 @@ database_manager.py
 '''
 
 import sqlite3
+import threading
 from database_setup import Setup
 from pathlib import Path
 
 db_file_name = Path(__file__).parent / "data/file_structure.db"
 
+# When capturing, the statements issued and the record/match counts are
+# recorded here, for the query profiler to inspect. Each thread has its own
+# capture, as Flask may serve overlapping requests on different threads
+_capture = threading.local()
+
 def get_connection_and_cursor():
   '''
   Get a connection and a cursor
@@ -24,6 +30,55 @@ def commit_and_close(conn):
   conn.commit()
   conn.close()
 
+def start_capture():
+  '''
+  Start recording the statements issued and the record/match counts
+  '''
+  _capture.data = {"statements": [], "records": 0, "matches": 0}
+
+def stop_capture():
+  '''
+  Stop recording
+
+  Returns: The recorded statements and record/match counts,
+           or None if this thread was not capturing
+  '''
+  captured = _get_capture()
+  _capture.data = None
+  return captured
+
+def _get_capture():
+  '''
+  Get this thread's capture
+
+  Returns: The capture, or None if this thread is not capturing
+  '''
+  return getattr(_capture, "data", None)
+
+def _record_statement(query, params):
+  '''
+  Record a statement if capturing is turned on
+  '''
+  captured = _get_capture()
+  if captured is not None:
+    captured["statements"].append((query, params))
+
+def explain_query_plan(query, params):
+  '''
+  Get SQLite's query plan for a statement
+
+  Parameters:
+          - 'query' the statement to explain
+          - 'params' the parameters of the statement
+
+  Returns: The query plan rows, as (id, parent, detail)
+  '''
+  conn, c = get_connection_and_cursor()
+  c.execute("EXPLAIN QUERY PLAN " + query, params)
+  plan = [(row[0], row[1], row[-1]) for row in c]
+  commit_and_close(conn)
+  return plan
+
 def setup_database():
   '''
   Create the database, including a table to store the paths
@@ -55,6 +110,7 @@ def get_nodes_to_root(node_id):
   '''
   conn, c = get_connection_and_cursor() 
   query = "SELECT * FROM paths WHERE id = ?" 
+  _record_statement(query, (node_id,))
   c.execute(query, (node_id,))
   query_records = list(c)
   commit_and_close(conn)
@@ -78,6 +134,7 @@ def get_paths_named_like(path_name):
 
   conn, c = get_connection_and_cursor()
   query = "SELECT * FROM paths WHERE name LIKE ?" 
+  _record_statement(query, (path_name + '%',))
   c.execute(query, (path_name + '%',))
   query_records = list(c)
   commit_and_close(conn)
@@ -98,11 +155,12 @@ def get_paths_and_parents(path_name):
 
   paths_and_parents = []
   parents = set()
+  initial_match_ids = set(x[2] for x in initial_matches)
 
   for record in initial_matches:
     paths_and_parents.append(record)
     record_parent_id = record[1]
-    if len([x for x in initial_matches if x[2] == record_parent_id]) == 0:
+    if record_parent_id not in initial_match_ids:
       # parent is not present in the initial_matches 
       if record_parent_id != -1: # root node has parent of -1
         parents.add(record_parent_id)
@@ -113,6 +171,11 @@ def get_paths_and_parents(path_name):
     for path in paths:
       paths_and_parents.append(path)
 
+  captured = _get_capture()
+  if captured is not None:
+    captured["records"] += len(paths_and_parents)
+    captured["matches"] += len(initial_matches)
+
   return paths_and_parents, initial_matches
 
 if __name__ == "__main__":
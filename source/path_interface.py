@@ -8,10 +8,12 @@ path_interface.py
  Provides the following
  - initialise function to read in the text file and create the database
  - query function to get required paths from the database
+ - opt-in profiling of slow queries
 '''
 
 import database_manager
 from tree_builder import Directory_Tree
+from query_profiler import Query_Profiler
 from pathlib import Path
 
 class Path_Interface:
@@ -27,6 +29,7 @@ class Path_Interface:
     '''
     txt_file = Path(__file__).parent / "data/file_structure.txt"
     self._tree = Directory_Tree(txt_file)
+    self._profiler = None
    
   def initialise(self):
     '''
@@ -39,6 +42,38 @@ class Path_Interface:
     # read in the directory structure and store in the database
     self._tree.create_tree_from_text_file()
 
+  def enable_profiling(self, slow_query_threshold=0.5, max_profiles=20):
+    '''
+    Turn on profiling of queries, keeping the details of slow ones
+
+    Parameters:
+          - 'slow_query_threshold' queries taking longer than this (seconds) are kept
+          - 'max_profiles' the number of slow query profiles to keep
+    '''
+    self._profiler = Query_Profiler(slow_query_threshold, max_profiles)
+
+  def disable_profiling(self):
+    '''
+    Turn off profiling of queries, discarding any profiles kept
+    '''
+    self._profiler = None
+
+  def is_profiling(self):
+    '''
+    Returns: True if profiling of queries is enabled
+    '''
+    return self._profiler is not None
+
+  def get_profiles(self):
+    '''
+    Get the profiles of slow queries
+
+    Returns: The profiles, most recent first, or None if profiling is not enabled
+    '''
+    if self._profiler is None:
+      return None
+    return self._profiler.get_profiles()
+
   def query_database(self, name_to_find):  
     '''
     Query the database 
@@ -49,7 +84,10 @@ class Path_Interface:
     '''
     results = None
     if name_to_find != None and name_to_find.strip() != "":
-      results = self._tree.query_database_and_build_paths(name_to_find)
+      if self._profiler is None:
+        results = self._tree.query_database_and_build_paths(name_to_find)
+      else:
+        results = self._profiler.profile_query(name_to_find, self._tree.query_database_and_build_paths)
     if results is None or results == []:
       results = ["No matching files or directories found"]
     return results
\ No newline at end of file
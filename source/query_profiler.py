@@ -0,0 +1,112 @@
+'''
+query_profiler.py
+ - Profiles queries and keeps the details of slow ones, so the
+   cause of a slow search can be seen without attaching a debugger
+'''
+
+import cProfile
+import pstats
+import io
+import time
+from collections import deque
+from datetime import datetime
+import database_manager
+
+class Query_Profiler():
+  '''
+  A class to profile queries, keeping the slowest ones in a bounded ring buffer
+  '''
+
+  def __init__(self, slow_query_threshold=0.5, max_profiles=20):
+    '''
+    Creates a new Query_Profiler object
+
+    Parameters:
+          - 'slow_query_threshold' queries taking longer than this (seconds) are kept
+          - 'max_profiles' the number of profiles to keep, the oldest are dropped first
+    '''
+    self.slow_query_threshold = slow_query_threshold
+    self.profiles = deque(maxlen=max_profiles)
+
+  def _explain_statements(self, statements):
+    '''
+    Get the query plan for each distinct statement issued
+
+    Parameters: 'statements' the (query, params) pairs issued to the database
+
+    Returns: A list of the statements, how often each was issued and its query plan
+    '''
+    explained = {}
+    for query, params in statements:
+      if query in explained:
+        explained[query]["count"] += 1
+      else:
+        explained[query] = {
+          "statement": query,
+          "count": 1,
+          "plan": database_manager.explain_query_plan(query, params)
+        }
+    return list(explained.values())
+
+  def _format_profile(self, profile):
+    '''
+    Format the profile as text, sorted by cumulative time
+
+    Returns: The profile as a string
+    '''
+    stream = io.StringIO()
+    stats = pstats.Stats(profile, stream=stream)
+    stats.sort_stats("cumulative").print_stats(20)
+    return stream.getvalue()
+
+  def profile_query(self, name_to_find, query_function):
+    '''
+    Call 'query_function' with 'name_to_find', profiling the call.
+    If it takes longer than the threshold, keep the profile
+
+    Parameters:
+          - 'name_to_find' the name being searched for
+          - 'query_function' the function that runs the query
+
+    Returns: The result of calling 'query_function'
+    '''
+    profile = cProfile.Profile()
+    database_manager.start_capture()
+    start = time.perf_counter()
+    try:
+      try:
+        profile.enable()
+      except ValueError:
+        # another profiler is already active (Python 3.12+ allows only one),
+        # so time the query without profiling it
+        profile = None
+      results = query_function(name_to_find)
+    finally:
+      if profile is not None:
+        profile.disable()
+      elapsed = time.perf_counter() - start
+      captured = database_manager.stop_capture()
+
+    if captured is None:
+      captured = {"statements": [], "records": 0, "matches": 0}
+
+    if elapsed > self.slow_query_threshold:
+      self.profiles.append({
+        "query": name_to_find,
+        "time": datetime.now().isoformat(),
+        "seconds": elapsed,
+        "records": captured["records"],
+        "matches": captured["matches"],
+        "statements": self._explain_statements(captured["statements"]),
+        "profile": self._format_profile(profile) if profile is not None else ""
+      })
+
+    return results
+
+  def get_profiles(self):
+    '''
+    Get the kept profiles
+
+    Returns: The profiles, most recent first
+    '''
+    return list(reversed(self.profiles))
@@ -139,24 +139,23 @@ class Directory_Tree():
     else:
       print("Failed to write to DB as self.tree_root is None")
 
-  def _add_children_from_db_records(self, node, records):
+  def _add_children_from_db_records(self, node, children_by_parent):
     '''
-    Add child nodes to 'node', using the information in 'records'
+    Add child nodes to 'node', using the information in 'children_by_parent'
 
     Parameters:
             - 'node' the node to add children to
-            - 'records' database records, containing node information
+            - 'children_by_parent' database records, grouped by parent id
 
     Returns: The constructed tree 
     '''
 
     # locate children
-    for rec in records:
-      if rec[1] == node.id:
-        # found a child 
-        child = Node(rec[0], rec[1], rec[2] , node.level + 1)
-        node.children.append(child)
-        self._add_children_from_db_records(child,records)
+    for rec in children_by_parent.get(node.id, []):
+      # found a child 
+      child = Node(rec[0], rec[1], rec[2] , node.level + 1)
+      node.children.append(child)
+      self._add_children_from_db_records(child, children_by_parent)
 
     return node # node with all children added recursively
 
@@ -182,7 +181,12 @@ class Directory_Tree():
         break
     
     if root != None:
-      tree = self._add_children_from_db_records(root,records)
+      # group the records by parent, so each node's children are found without
+      # scanning all of the records
+      children_by_parent = {}
+      for rec in records:
+        children_by_parent.setdefault(rec[1], []).append(rec)
+      tree = self._add_children_from_db_records(root, children_by_parent)
      
     return tree
 
@@ -204,51 +208,72 @@ class Directory_Tree():
 
     return leafs
 
-  def _get_full_path_to_node(self, leaf, tree_dict):
+  def _get_prefix_for_children(self, node_id, tree_dict, prefix_cache):
+    '''
+    Get the path shared by the children of a node, e.g. "C:\\Documents\\".
+    The prefix of each ancestor is computed once and stored in 'prefix_cache',
+    so sibling nodes do not repeat the walk back to the root
+
+    Parameters:
+            - 'node_id' the id of the node to get the prefix for
+            - 'tree_dict' the tree stored as a dictionary 
+            - 'prefix_cache' dict<node id, prefix> of the prefixes already computed
+
+    Returns: The path to the node, ending with a separator
+    '''
+    # walk up to the root, or the first ancestor whose prefix is known
+    unresolved = []
+    prefix = None
+    while prefix is None:
+      if node_id in prefix_cache:
+        prefix = prefix_cache[node_id]
+      elif tree_dict.get(node_id) == None:
+        print(f"node id {node_id} was not found in dictionary")
+        prefix = "\\"
+        prefix_cache[node_id] = prefix
+      else:
+        item = tree_dict[node_id]
+        if item[1] == -1:
+          prefix = item[0] # the root's name already ends with a backslash
+          prefix_cache[node_id] = prefix
+        else:
+          unresolved.append(item)
+          node_id = item[1]
+
+    # work back down, storing the prefix of each ancestor passed on the way up
+    for item in reversed(unresolved):
+      prefix = prefix + item[0] + "\\"
+      prefix_cache[item[2]] = prefix
+
+    return prefix
+
+  def _get_full_path_to_node(self, leaf, tree_dict, prefix_cache):
     '''
     Construct the full path to the node 
 
     Parameters:
             - 'leaf' the leaf node to get the full path for
             - 'tree_dict' the tree stored as a dictionary 
+            - 'prefix_cache' dict<node id, prefix> of the prefixes already computed
 
     Returns: The full path from route to the leaf
     '''
-    full_path = ""
-  
     node_name = leaf[0]
     node_parent = leaf[1]
-    node_id = leaf[2]
 
     if node_parent == -1:
       return node_name
 
-    full_path = "\\" + node_name
-    
-    while node_parent != -1:
-      if tree_dict.get(node_parent) != None:
-        item = tree_dict[node_parent]
-        node_name = item[0]
-        node_parent = item[1]
-        node_id = item[2]
-        if node_parent == -1:
-          full_path = full_path[1:] #remove leading backslash
-          full_path = node_name + full_path
-        else:
-          full_path = "\\" + node_name + full_path
-      else:
-        print(f"node id {node_parent} was not found in dictionary")
-        break
-
-    return full_path
+    return self._get_prefix_for_children(node_parent, tree_dict, prefix_cache) + node_name
 
-  def _create_list_from_tree(self, tree, tree_dict):
+  def _create_list_from_tree(self, tree, tree_dict, prefix_cache):
     '''
     Create a list of paths (one per leaf node) 
 
     Paramters: 
           - 'tree' the tree to convert
           - 'tree_dict' a dictionary of tree nodes
+          - 'prefix_cache' dict<node id, prefix> of the prefixes already computed
     Returns: A list of paths of leaves, to display to the user
     '''
     path_list = []
@@ -258,7 +283,7 @@ class Directory_Tree():
     
     # get the full path for each image
     for leaf in leafs:    
-      path_list.append(self._get_full_path_to_node(tree_dict[leaf.id], tree_dict))
+      path_list.append(self._get_full_path_to_node(tree_dict[leaf.id], tree_dict, prefix_cache))
 
     return path_list, leafs
 
@@ -275,7 +300,7 @@ class Directory_Tree():
       tree_dict[rec[2]] = rec
     return tree_dict
 
-  def _create_list_of_non_leaf_matches(self, non_leaf_matches, tree, tree_dict):
+  def _create_list_of_non_leaf_matches(self, non_leaf_matches, tree, tree_dict, prefix_cache):
     '''
     Create a list of the full paths of non-leaf nodes
 
@@ -283,6 +308,7 @@ class Directory_Tree():
           - 'non_leaf_matches' the nodes whose full paths are to be determined
           - 'tree' the tree 
           - 'tree_dict' a dictionary of tree nodes
+          - 'prefix_cache' dict<node id, prefix> of the prefixes already computed
 
     Returns: A list of full paths to each node contained in the 'non_leaf_matches' parameter
     '''
@@ -291,7 +317,7 @@ class Directory_Tree():
     for match in non_leaf_matches:
       node_id = match[2]
       node = tree_dict[node_id]
-      full_paths.append(self._get_full_path_to_node(node, tree_dict))
+      full_paths.append(self._get_full_path_to_node(node, tree_dict, prefix_cache))
 
     return full_paths
 
@@ -318,22 +344,29 @@ class Directory_Tree():
       tree_dict = self._create_dictionary(matching_records_to_root)
 
       # tree => a directory tree structure - contains items recieved from searching the database
-      tree = self._create_tree_from_db_records(matching_records_to_root)
+      # built from tree_dict, as an ancestor shared by several matches is returned once per match
+      tree = self._create_tree_from_db_records(list(tree_dict.values()))
+
+      # prefix_cache => the path prefix of each ancestor, shared by the leaves and non-leaf matches
+      prefix_cache = {}
 
       # leafs => the tree's leaves 
       # display_list => a list of full paths to each leaf 
-      display_list, leafs = self._create_list_from_tree(tree, tree_dict)
+      display_list, leafs = self._create_list_from_tree(tree, tree_dict, prefix_cache)
 
       # create a list of non-leaf matches 
-      leaf_node_ids = []
+      leaf_node_ids = set()
       for node in leafs:
-        leaf_node_ids.append(node.id)
+        leaf_node_ids.add(node.id)
       non_leaf_matches = [f for f in initial_matches if f[2] not in leaf_node_ids]
 
       if len(non_leaf_matches) > 0:
         # get a list of full paths to each non-leaf match
-        non_leaf_display_list = self._create_list_of_non_leaf_matches(non_leaf_matches, tree, tree_dict)
+        non_leaf_display_list = self._create_list_of_non_leaf_matches(non_leaf_matches, tree, tree_dict, prefix_cache)
         # add these paths to the display_list
         display_list.extend(non_leaf_display_list)
+
+      # remove duplicate paths, keeping the order
+      display_list = list(dict.fromkeys(display_list))
    
     return display_list # list of full paths for each matching node 
\ No newline at end of file
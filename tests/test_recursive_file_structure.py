@@ -4,8 +4,12 @@ Tests for the recursive file structure solution
 
 import pytest
 import sys
+import json
+import threading
 sys.path.append("../source")
 from path_interface import Path_Interface
+from tree_builder import Directory_Tree
+import database_manager
 
 def test_Search_for_none():
     '''
@@ -59,3 +63,138 @@ def test_search_for_skpye():
     query = 'skype'
     result = pi.query_database(query)
     assert result == ['C:\\Program\tFiles\\Skype\\Skype.exe', 'C:\\Program\tFiles\\Skype']
+
+def test_profiling_keeps_slow_query():
+    '''
+    Test that with profiling enabled, a query slower than the threshold is kept
+    along with its query plans and record/match counts, and results are unchanged
+    '''
+    pi = Path_Interface()
+    pi.initialise()
+    pi.enable_profiling(slow_query_threshold=0)
+    result = pi.query_database('skype')
+    assert result == ['C:\\Program\tFiles\\Skype\\Skype.exe', 'C:\\Program\tFiles\\Skype']
+    profiles = pi.get_profiles()
+    assert len(profiles) == 1
+    assert profiles[0]['query'] == 'skype'
+    assert profiles[0]['matches'] == 2
+    assert profiles[0]['records'] == 4
+    assert len(profiles[0]['statements']) == 2
+    assert all(len(s['plan']) > 0 for s in profiles[0]['statements'])
+
+def test_profiling_ring_buffer_is_bounded():
+    '''
+    Test that only the most recent slow query profiles are kept
+    '''
+    pi = Path_Interface()
+    pi.initialise()
+    pi.enable_profiling(slow_query_threshold=0, max_profiles=2)
+    for query in ['image', 'skype', 'Documents']:
+        pi.query_database(query)
+    profiles = pi.get_profiles()
+    assert [p['query'] for p in profiles] == ['Documents', 'skype']
+
+def test_profiling_ignores_fast_query():
+    '''
+    Test that a query faster than the threshold is not kept
+    '''
+    pi = Path_Interface()
+    pi.initialise()
+    pi.enable_profiling(slow_query_threshold=60)
+    pi.query_database('image')
+    assert pi.get_profiles() == []
+
+def test_profiling_overlapping_queries():
+    '''
+    Test that queries profiled at the same time, on different threads,
+    each keep their own record/match counts
+    '''
+    pi = Path_Interface()
+    pi.initialise()
+    pi.enable_profiling(slow_query_threshold=0)
+    barrier = threading.Barrier(2, timeout=10)
+
+    def search(query):
+        # hold both queries open until both have run
+        results = pi._tree.query_database_and_build_paths(query)
+        barrier.wait()
+        return results
+
+    threads = [threading.Thread(target=pi._profiler.profile_query, args=(query, search))
+               for query in ['image', 'skype']]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    counts = {p['query']: (p['records'], p['matches']) for p in pi.get_profiles()}
+    assert counts == {'image': (6, 4), 'skype': (4, 2)}
+
+def test_debug_profiles_route(monkeypatch):
+    '''
+    Test that /debug/profiles returns 404 while profiling is off,
+    and the profiles of slow queries as JSON once it is turned on in the config
+    '''
+    pytest.importorskip('flask')
+    pytest.importorskip('flask_wtf')
+    import app
+    client = app.app.test_client()
+
+    monkeypatch.setitem(app.app.config, 'PROFILE_SLOW_QUERIES', False)
+    assert client.get('/debug/profiles').status_code == 404
+
+    monkeypatch.setitem(app.app.config, 'PROFILE_SLOW_QUERIES', True)
+    monkeypatch.setitem(app.app.config, 'SLOW_QUERY_THRESHOLD', 0)
+    client.get('/rest?search=skype')
+    response = client.get('/debug/profiles')
+    assert response.status_code == 200
+    profiles = json.loads(response.data)
+    assert [p['query'] for p in profiles] == ['skype']
+    assert profiles[0]['matches'] == 2
+
+    # turning profiling off again discards the profiles
+    monkeypatch.setitem(app.app.config, 'PROFILE_SLOW_QUERIES', False)
+    assert client.get('/debug/profiles').status_code == 404
+
+def test_full_paths_share_ancestor_prefixes():
+    '''
+    Test that sibling paths are built from the same ancestor prefix,
+    and that a missing ancestor leaves a path starting with a backslash
+    '''
+    tree = Directory_Tree(None)
+    records = [('C:\\', -1, 0), ('Documents', 0, 1), ('Images', 1, 2)]
+    records += [(f'Image{i}.jpg', 2, 3 + i) for i in range(1000)]
+    records += [('Orphan.txt', 9999, 2000)]
+    tree_dict = tree._create_dictionary(records)
+    prefix_cache = {}
+    paths = [tree._get_full_path_to_node(rec, tree_dict, prefix_cache) for rec in records]
+    assert paths[:4] == ['C:\\', 'C:\\Documents', 'C:\\Documents\\Images', 'C:\\Documents\\Images\\Image0.jpg']
+    assert paths[-2] == 'C:\\Documents\\Images\\Image999.jpg'
+    assert paths[-1] == '\\Orphan.txt'
+    assert prefix_cache[2] == 'C:\\Documents\\Images\\'
+
+def test_matches_in_directories_with_shared_ancestor(tmp_path, monkeypatch):
+    '''
+    Test that matches in several directories under a shared ancestor
+    return each path once, in order
+    '''
+    indent = ' ' * 7
+    lines = ['C:\\', indent + 'Documents']
+    expected = []
+    for album in range(5):
+        lines.append(indent * 2 + f'Album{album}')
+        for photo in range(4):
+            lines.append(indent * 3 + f'Photo{album}_{photo}.jpg')
+            expected.append(f'C:\\Documents\\Album{album}\\Photo{album}_{photo}.jpg')
+    text_file = tmp_path / 'file_structure.txt'
+    text_file.write_text('\n'.join(lines))
+
+    # use a throwaway database, leaving the one in source/data untouched
+    monkeypatch.setattr(database_manager, 'db_file_name', tmp_path / 'file_structure.db')
+    database_manager.setup_database()
+    tree = Directory_Tree(text_file)
+    tree.create_tree_from_text_file()
+
+    result = tree.query_database_and_build_paths('Photo')
+    assert len(result) == len(set(result)) == 20
+    assert result == expected